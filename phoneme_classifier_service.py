@@ -1,9 +1,9 @@
 # pip install tensorflow numpy librosa joblib scipy noisereduce
 
 import os
+import sys
 import numpy as np
 import librosa
-import tensorflow as tf
 import joblib
 from scipy.io.wavfile import write
 import noisereduce as nr
@@ -13,6 +13,8 @@ import json
 # --- Configuration: Point to your VAD-trained model files ---
 MODEL_PATH = "phoneme_recognition_model_vad.h5"
 ENCODER_PATH = "label_encoder_vad.joblib"
+# Optional cheap first stage, produced by train_cascade.py
+CASCADE_PATH = "phoneme_cascade_stage1.joblib"
 
 # --- Audio Parameters ---
 SAMPLE_RATE = 22050
@@ -20,29 +22,101 @@ RECORD_DURATION = 2.0
 TARGET_DURATION = 1.0
 MAX_PAD_LEN = int(TARGET_DURATION * SAMPLE_RATE)
 
+# --- Cascade Parameters ---
+# Stage 1 answers only when (top-1 prob - top-2 prob) is at least this margin
+CASCADE_MARGIN_THRESHOLD = 0.5
+
+def pool_log_mel(log_mel_spec):
+    """Pools a log-mel spectrogram into per-band mean and std over time."""
+    return np.concatenate([log_mel_spec.mean(axis=1), log_mel_spec.std(axis=1)]).astype(np.float32)
+
+def nearest_centroid_probs(pooled, stage1):
+    """
+    Returns class probabilities from a softmax over negative centroid distances.
+
+    train_cascade.py fits the temperature on held-out clips so these are
+    calibrated probabilities on the same 0..1 scale as the CNN's softmax.
+    """
+    x = (pooled - stage1["mean"]) / stage1["std"]
+    dists = np.sum((stage1["centroids"] - x) ** 2, axis=1) / x.shape[0]
+    logits = -dists / stage1.get("temperature", 1.0)
+    logits -= np.max(logits)
+    probs = np.exp(logits)
+    return probs / np.sum(probs)
+
+def top_margin(probs):
+    """Returns the top class index and its probability lead over the runner-up."""
+    order = np.argsort(probs)
+    if len(order) < 2:
+        # Only one class: nothing to confuse it with
+        return order[-1], 1.0
+    return order[-1], probs[order[-1]] - probs[order[-2]]
+
 class PhonemeClassifier:
-    def __init__(self):
-        """Initialize the phoneme classifier with model and encoder."""
+    def __init__(self, use_cascade=True, cascade_threshold=None):
+        """
+        Initialize the phoneme classifier with model and encoder.
+
+        Args:
+            use_cascade: Try the cheap stage-1 classifier before the CNN when
+                its file (CASCADE_PATH) is present
+            cascade_threshold: Minimum stage-1 margin needed to skip the CNN.
+                Defaults to the calibrated value saved with stage 1, or
+                CASCADE_MARGIN_THRESHOLD if none was saved
+        """
         self.model = None
         self.label_encoder = None
+        self.stage1 = None
+        self.cascade_threshold = cascade_threshold
         self._load_model()
+        if use_cascade:
+            self._load_cascade()
     
     def _load_model(self):
-        """Load the trained model and label encoder."""
+        """Load the label encoder. The CNN itself is loaded by load_cnn_model() on first use."""
         try:
             if not os.path.exists(MODEL_PATH) or not os.path.exists(ENCODER_PATH):
                 raise FileNotFoundError(f"Model files not found: {MODEL_PATH} or {ENCODER_PATH}")
             
             # Suppress print statements to avoid JSON parse errors
             # print("Loading the VAD-trained phoneme recognition model...")
-            self.model = tf.keras.models.load_model(MODEL_PATH)
             self.label_encoder = joblib.load(ENCODER_PATH)
             # print("Model loaded successfully.")
         except Exception as e:
             # print(f"Error loading model: {e}")
             raise
-    
-    
+
+    def load_cnn_model(self):
+        """
+        Load the CNN on first use and return it.
+
+        Importing tensorflow and loading the model cost far more than one
+        forward pass, and server.js starts a new process per request, so
+        this only runs on the stage-2 path.
+        """
+        if self.model is None:
+            import tensorflow as tf
+            self.model = tf.keras.models.load_model(MODEL_PATH)
+        return self.model
+
+    def _load_cascade(self):
+        """Load the stage-1 nearest-centroid classifier, if one has been trained."""
+        if not os.path.exists(CASCADE_PATH):
+            return
+        stage1 = joblib.load(CASCADE_PATH)
+        if list(stage1["classes"]) != list(self.label_encoder.classes_):
+            # Stage 1 is optional: fall back to the CNN rather than failing.
+            # Warn on stderr, since server.js parses stdout as JSON.
+            print(f"Warning: {CASCADE_PATH} was trained for different classes than {ENCODER_PATH}; "
+                  "skipping stage 1. Re-run train_cascade.py.", file=sys.stderr)
+            return
+        if not stage1.get("enabled", True):
+            # Calibration found no threshold meeting the target accuracy
+            return
+        self.stage1 = stage1
+        if self.cascade_threshold is None:
+            self.cascade_threshold = stage1.get("threshold", CASCADE_MARGIN_THRESHOLD)
+
     def process_audio_with_vad(self, audio, sample_rate):
         """Trims silence and pads/truncates to the target length."""
         trimmed_audio, index = librosa.effects.trim(audio, top_db=25)
@@ -72,19 +146,82 @@ class PhonemeClassifier:
 
     def predict_phoneme(self, file_path):
         """Predicts the phoneme for the processed audio file."""
-        if self.model is None or self.label_encoder is None:
-            raise RuntimeError("Model not loaded")
+        label, confidence, _ = self.predict_phoneme_cascade(file_path)
+        return label, confidence
+
+    def preprocess_audio_file(self, audio_file_path):
+        """
+        Runs the classify_audio_file pipeline up to the model input.
+
+        Shared with train_cascade.py so stage 1 is trained on exactly the
+        features it sees at inference time.
+
+        Returns:
+            tuple: (log_mel_spec, processed_audio). Both are None when no speech
+            is detected; log_mel_spec is None if feature extraction failed
+        """
+        # Load audio (2-second recording)
+        audio, sr = librosa.load(audio_file_path, sr=SAMPLE_RATE)
         
-        features = self.extract_features(file_path)
+        # --- Combined Pre-processing Pipeline (exact same as original) ---
+        # 2a. Convert to floating point
+        recording_float = audio.astype(np.float32)
+        if np.max(np.abs(recording_float)) > 1.0:
+            recording_float = recording_float / np.max(np.abs(recording_float))
+
+        # 2b. Apply VAD to the audio to find and extract speech
+        vad_processed_audio = self.process_audio_with_vad(recording_float, SAMPLE_RATE)
+        if vad_processed_audio is None:
+            return None, None
+
+        return self._features_from_processed_audio(vad_processed_audio), vad_processed_audio
+
+    def _features_from_processed_audio(self, processed_audio):
+        """Round-trips a processed 1-second clip through an int16 WAV, as the model was trained."""
+        # Convert final 1-second clip back to int16 for saving
+        final_audio_int16 = (processed_audio * 32768.0).astype(np.int16)
+        with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
+            temp_path = temp_file.name
+            write(temp_path, SAMPLE_RATE, final_audio_int16)
+        try:
+            return self.extract_features(temp_path)
+        finally:
+            os.unlink(temp_path)
+
+    def predict_phoneme_cascade(self, file_path):
+        """
+        Predicts the phoneme, trying the cheap stage-1 classifier before the CNN.
+
+        Returns:
+            tuple: (label, confidence, stage) where stage is 1 or 2, or None
+            if features could not be extracted. Stage-1 confidence is the
+            temperature-calibrated centroid softmax, stage-2 the CNN softmax
+        """
+        return self.predict_from_features(self.extract_features(file_path))
+
+    def predict_from_features(self, features):
+        """Runs the cascade on a log-mel spectrogram; see predict_phoneme_cascade."""
+        if self.label_encoder is None:
+            raise RuntimeError("Model not loaded")
+
         if features is None: 
-            return "Could not extract features.", 0.0
-        
+            return "Could not extract features.", 0.0, None
+
+        # Stage 1: nearest centroid on pooled log-mel statistics
+        if self.stage1 is not None:
+            probs = nearest_centroid_probs(pool_log_mel(features), self.stage1)
+            predicted_index, margin = top_margin(probs)
+            if margin >= self.cascade_threshold:
+                predicted_label = self.label_encoder.inverse_transform([predicted_index])[0]
+                return predicted_label, probs[predicted_index], 1
+
+        # Stage 2: full CNN
         features = features[np.newaxis, ..., np.newaxis]
-        prediction_probs = self.model.predict(features, verbose=0)[0]
+        prediction_probs = self.load_cnn_model().predict(features, verbose=0)[0]
         predicted_index = np.argmax(prediction_probs)
         predicted_label = self.label_encoder.inverse_transform([predicted_index])[0]
         confidence = prediction_probs[predicted_index]
-        return predicted_label, confidence
+        return predicted_label, confidence, 2
 
 
     def classify_audio_file(self, audio_file_path):
@@ -98,17 +235,7 @@ class PhonemeClassifier:
             dict: Classification result with phoneme, confidence, and metadata
         """
         try:
-            # Load audio (2-second recording)
-            audio, sr = librosa.load(audio_file_path, sr=SAMPLE_RATE)
-            
-            # --- Combined Pre-processing Pipeline (exact same as original) ---
-            # 2a. Convert to floating point
-            recording_float = audio.astype(np.float32)
-            if np.max(np.abs(recording_float)) > 1.0:
-                recording_float = recording_float / np.max(np.abs(recording_float))
-
-            # 2b. Apply VAD to the audio to find and extract speech
-            vad_processed_audio = self.process_audio_with_vad(recording_float, SAMPLE_RATE)
+            features, vad_processed_audio = self.preprocess_audio_file(audio_file_path)
             
             if vad_processed_audio is None:
                 return {
@@ -118,26 +245,16 @@ class PhonemeClassifier:
                     "confidence": 0.0
                 }
 
-            # 2c. Convert final 1-second clip back to int16 for saving
-            final_audio_int16 = (vad_processed_audio * 32768.0).astype(np.int16)
-
-            # --- Step 3: SAVE AND PREDICT ---
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_path = temp_file.name
-                write(temp_path, SAMPLE_RATE, final_audio_int16)
-            
-            # Predict phoneme
-            phoneme, confidence = self.predict_phoneme(temp_path)
-            
-            # Clean up temporary file
-            os.unlink(temp_path)
+            # --- Step 3: PREDICT ---
+            phoneme, confidence, stage = self.predict_from_features(features)
             
             return {
                 "success": True,
                 "phoneme": phoneme,
                 "confidence": float(confidence),
                 "confidence_percentage": float(confidence * 100),
-                "processed_duration": len(vad_processed_audio) / SAMPLE_RATE
+                "processed_duration": len(vad_processed_audio) / SAMPLE_RATE,
+                "stage": stage
             }
             
         except Exception as e:
@@ -183,24 +300,17 @@ class PhonemeClassifier:
                     "confidence": 0.0
                 }
             
-            # Save processed audio to temporary file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
-                temp_path = temp_file.name
-                final_audio_int16 = (processed_audio * 32768.0).astype(np.int16)
-                write(temp_path, SAMPLE_RATE, final_audio_int16)
-            
             # Predict phoneme
-            phoneme, confidence = self.predict_phoneme(temp_path)
-            
-            # Clean up temporary file
-            os.unlink(temp_path)
+            features = self._features_from_processed_audio(processed_audio)
+            phoneme, confidence, stage = self.predict_from_features(features)
             
             return {
                 "success": True,
                 "phoneme": phoneme,
                 "confidence": float(confidence),
                 "confidence_percentage": float(confidence * 100),
-                "processed_duration": len(processed_audio) / SAMPLE_RATE
+                "processed_duration": len(processed_audio) / SAMPLE_RATE,
+                "stage": stage
             }
             
         except Exception as e:
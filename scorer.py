@@ -112,40 +112,46 @@ def word_substitution_cost(expected, spoken):
 # --------------------------
 # Alignment DP
 # --------------------------
-def align_expected_to_spoken(expected_words, spoken_words):
-    m, n = len(expected_words), len(spoken_words)
-    # dp cost matrix
-    dp = [[0.0] * (n + 1) for _ in range(m + 1)]
-    op = [[None] * (n + 1) for _ in range(m + 1)]
-
+def _first_column(expected_words):
+    # column for zero spoken words: every expected word deleted
+    m = len(expected_words)
+    dp_col = [0.0] * (m + 1)
+    op_col = [None] * (m + 1)
     for i in range(1, m + 1):
-        dp[i][0] = dp[i-1][0] + DEL_COST
-        op[i][0] = ("del", expected_words[i-1], None, 1.0)
-    for j in range(1, n + 1):
-        dp[0][j] = dp[0][j-1] + INS_COST
-        op[0][j] = ("ins", None, spoken_words[j-1], 1.0)
+        dp_col[i] = dp_col[i-1] + DEL_COST
+        op_col[i] = ("del", expected_words[i-1], None, 1.0)
+    return dp_col, op_col
+
+def _next_column(expected_words, prev_dp, spoken_word):
+    # extend the DP by one spoken word: O(m) given the previous column
+    m = len(expected_words)
+    dp_col = [0.0] * (m + 1)
+    op_col = [None] * (m + 1)
+    dp_col[0] = prev_dp[0] + INS_COST
+    op_col[0] = ("ins", None, spoken_word, 1.0)
 
     for i in range(1, m + 1):
-        for j in range(1, n + 1):
-            wd = word_substitution_cost(expected_words[i-1], spoken_words[j-1])
-            sub_cost = SUB_COST_WEIGHT * wd
-            if expected_words[i-1] == spoken_words[j-1]:
-                sub_cost = 0.0
-
-            choices = [
-                (dp[i-1][j] + DEL_COST, ("del", expected_words[i-1], None, 1.0)),
-                (dp[i][j-1] + INS_COST, ("ins", None, spoken_words[j-1], 1.0)),
-                (dp[i-1][j-1] + sub_cost, ("sub", expected_words[i-1], spoken_words[j-1], wd)),
-            ]
-            best = min(choices, key=lambda x: x[0])
-            dp[i][j] = best[0]
-            op[i][j] = best[1]
-
-    # backtrack
-    i, j = m, n
+        wd = word_substitution_cost(expected_words[i-1], spoken_word)
+        sub_cost = SUB_COST_WEIGHT * wd
+        if expected_words[i-1] == spoken_word:
+            sub_cost = 0.0
+
+        choices = [
+            (dp_col[i-1] + DEL_COST, ("del", expected_words[i-1], None, 1.0)),
+            (prev_dp[i] + INS_COST, ("ins", None, spoken_word, 1.0)),
+            (prev_dp[i-1] + sub_cost, ("sub", expected_words[i-1], spoken_word, wd)),
+        ]
+        best = min(choices, key=lambda x: x[0])
+        dp_col[i] = best[0]
+        op_col[i] = best[1]
+    return dp_col, op_col
+
+def _backtrack(op_cols, m):
+    # op_cols[j][i] holds the op for expected prefix i and spoken prefix j
+    i, j = m, len(op_cols) - 1
     alignment = []
     while i > 0 or j > 0:
-        cur = op[i][j]
+        cur = op_cols[j][i]
         if cur is None:
             break
         typ = cur[0]
@@ -172,18 +178,24 @@ def align_expected_to_spoken(expected_words, spoken_words):
             j -= 1
 
     alignment.reverse()
-    total_cost = dp[m][n]
+    return alignment
+
+def align_expected_to_spoken(expected_words, spoken_words):
+    # dp is built one spoken word (column) at a time so IncrementalScorer can share it
+    dp_col, op_col = _first_column(expected_words)
+    op_cols = [op_col]
+    for spoken_word in spoken_words:
+        dp_col, op_col = _next_column(expected_words, dp_col, spoken_word)
+        op_cols.append(op_col)
+
+    alignment = _backtrack(op_cols, len(expected_words))
+    total_cost = dp_col[len(expected_words)]
     return alignment, total_cost
 
 # --------------------------
 # Scoring wrapper
 # --------------------------
-def score_pair(target_sentence, spoken_sentence):
-    tkn_t = [w for w in normalize_text(target_sentence).split() if w]
-    tkn_s = [w for w in normalize_text(spoken_sentence).split() if w]
-
-    alignment, total_cost = align_expected_to_spoken(tkn_t, tkn_s)
-
+def _build_result(tkn_t, tkn_s, alignment, total_cost):
     # collect misspoken list
     misspoken = []
     for item in alignment:
@@ -213,6 +225,69 @@ def score_pair(target_sentence, spoken_sentence):
     }
     return result
 
+def score_pair(target_sentence, spoken_sentence):
+    tkn_t = [w for w in normalize_text(target_sentence).split() if w]
+    tkn_s = [w for w in normalize_text(spoken_sentence).split() if w]
+
+    alignment, total_cost = align_expected_to_spoken(tkn_t, tkn_s)
+    return _build_result(tkn_t, tkn_s, alignment, total_cost)
+
+class IncrementalScorer:
+    """
+    Scores a streaming transcript against a fixed target.
+
+    Each new spoken word adds one DP column (O(m) for m target words)
+    instead of rebuilding the whole grid. Results match score_pair on the
+    same text.
+
+    Usage:
+      session = IncrementalScorer("That is why.")
+      session.update("that")         # partial transcript so far
+      session.update("that's why")   # revised partial: only changed words are rescored
+    """
+
+    def __init__(self, target_sentence):
+        self.target_words = [w for w in normalize_text(target_sentence).split() if w]
+        self.spoken_words = []
+        dp_col, op_col = _first_column(self.target_words)
+        self._dp_cols = [dp_col]
+        self._op_cols = [op_col]
+
+    def append(self, text):
+        """Append newly spoken text and return the provisional result."""
+        for w in normalize_text(text).split():
+            self._push(w)
+        return self.result()
+
+    def update(self, partial_transcript):
+        """Replace the transcript so far, keeping columns for the unchanged word prefix."""
+        words = [w for w in normalize_text(partial_transcript).split() if w]
+        keep = 0
+        while keep < min(len(words), len(self.spoken_words)) and words[keep] == self.spoken_words[keep]:
+            keep += 1
+        while len(self.spoken_words) > keep:
+            self._pop()
+        for w in words[keep:]:
+            self._push(w)
+        return self.result()
+
+    def result(self):
+        """Provisional alignment and score for the words received so far."""
+        m = len(self.target_words)
+        alignment = _backtrack(self._op_cols, m)
+        return _build_result(self.target_words, self.spoken_words, alignment, self._dp_cols[-1][m])
+
+    def _push(self, spoken_word):
+        dp_col, op_col = _next_column(self.target_words, self._dp_cols[-1], spoken_word)
+        self.spoken_words.append(spoken_word)
+        self._dp_cols.append(dp_col)
+        self._op_cols.append(op_col)
+
+    def _pop(self):
+        self.spoken_words.pop()
+        self._dp_cols.pop()
+        self._op_cols.pop()
+
 # --------------------------
 # CLI / JSON interface
 # --------------------------
@@ -19,6 +19,10 @@ const OPENROUTER_API_KEY = process.env.OPENROUTER_API_KEY;
 let phonemeClassifier = null;
 let isModelLoaded = false;
 
+// Which cascade stage answered each phoneme classification. Each request runs
+// in its own Python process, so hit rates are tallied here in the server.
+const cascadeStageCounts = { 1: 0, 2: 0 };
+
 // Debug: Check if API keys are loaded
 console.log("Environment check:");
 console.log(
@@ -606,6 +610,14 @@ app.post("/api/classify-phoneme", upload.single("audio"), async (req, res) => {
 
         if (jsonOutput) {
           const result = JSON.parse(jsonOutput);
+          if (result.stage in cascadeStageCounts) {
+            cascadeStageCounts[result.stage] += 1;
+            const total = cascadeStageCounts[1] + cascadeStageCounts[2];
+            console.log(
+              `Phoneme classified by stage ${result.stage} ` +
+                `(stage 1 hit rate: ${((cascadeStageCounts[1] / total) * 100).toFixed(1)}% of ${total})`
+            );
+          }
           res.json(result);
         } else {
           throw new Error("No valid JSON found in output");
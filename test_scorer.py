@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Test script for the incremental sentence scorer
+"""
+
+import random
+import sys
+from scorer import IncrementalScorer, score_pair
+
+VOCAB = "that is why i said it the cat sat on mat she sells thats dont sad bat".split()
+
+def test_score_pair_known_case():
+    """Checks score_pair against output recorded before the DP was built column by column."""
+    print("Testing score_pair...")
+    result = score_pair("That is why I said it.", "Thats why I sad")
+    ops = [(a["op"], a["expected"], a["spoken"]) for a in result["alignment"]]
+    expected_ops = [
+        ("substitute", "that", "thats"), ("delete", "is", None), ("substitute", "why", "why"),
+        ("substitute", "i", "i"), ("substitute", "said", "sad"), ("delete", "it", None),
+    ]
+    if result["score"] != 55.56 or result["total_cost"] != 2.6667 or ops != expected_ops:
+        print(f"✗ Unexpected result: {result}")
+        return False
+    print("✓ score_pair alignment and score unchanged")
+    return True
+
+def test_incremental_matches_score_pair(cases=200, steps=10, seed=0):
+    """Checks IncrementalScorer against score_pair after every append, revision and rollback."""
+    print("Testing incremental scorer...")
+    rng = random.Random(seed)
+    for _ in range(cases):
+        target = " ".join(rng.choice(VOCAB) for _ in range(rng.randint(0, 8)))
+        session = IncrementalScorer(target)
+        words = []
+        for _ in range(steps):
+            r = rng.random()
+            if r < 0.5:
+                # new word arrives
+                word = rng.choice(VOCAB)
+                words.append(word)
+                result = session.append(word)
+            elif r < 0.8 and words:
+                # partial transcript revises its last word
+                words[-1] = rng.choice(VOCAB)
+                result = session.update(" ".join(words))
+            else:
+                # partial transcript drops trailing words
+                words = words[:rng.randint(0, len(words))]
+                result = session.update(" ".join(words))
+
+            expected = score_pair(target, " ".join(words))
+            if result != expected:
+                print(f"✗ Mismatch for target '{target}', spoken '{' '.join(words)}'")
+                print(f"  incremental: {result}")
+                print(f"  score_pair:  {expected}")
+                return False
+    print(f"✓ {cases} sessions match score_pair")
+    return True
+
+if __name__ == "__main__":
+    success = test_score_pair_known_case() and test_incremental_matches_score_pair()
+    sys.exit(0 if success else 1)
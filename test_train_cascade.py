@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test script for the cascade calibration helpers in train_cascade.py
+"""
+
+import sys
+import numpy as np
+from phoneme_classifier_service import nearest_centroid_probs
+from train_cascade import calibrate_threshold, stratified_split, top_margin
+
+def test_top_margin():
+    """Checks the margin for normal, single-class and saturated probabilities."""
+    index, margin = top_margin(np.array([0.2, 0.7, 0.1]))
+    assert index == 1 and np.isclose(margin, 0.5)
+
+    index, margin = top_margin(np.array([1.0]))
+    assert index == 0 and margin == 1.0
+
+    # A confident float32 stage 1 at low temperature saturates to a margin of exactly 1.0
+    stage1 = {
+        "mean": np.zeros(2, dtype=np.float32),
+        "std": np.ones(2, dtype=np.float32),
+        "centroids": np.array([[0.0, 0.0], [3.0, 3.0]], dtype=np.float32),
+        "temperature": 0.01,
+    }
+    _, margin = top_margin(nearest_centroid_probs(np.zeros(2, dtype=np.float32), stage1))
+    assert margin == 1.0
+    print("✓ top_margin")
+
+def test_calibrate_threshold():
+    """Checks the chosen threshold, and that a failed calibration accepts nothing."""
+    labels = np.array([0, 0, 1, 1])
+    preds = np.array([0, 0, 1, 0])
+    margins = np.array([0.9, 0.8, 0.7, 0.3])
+    assert calibrate_threshold(preds, margins, labels, 1.0) == 0.31
+
+    # Wrong answers even at saturated margins: stage 1 must never answer
+    preds = np.array([1, 1, 0, 0])
+    margins = np.array([1.0, 1.0, 1.0, 1.0])
+    threshold = calibrate_threshold(preds, margins, labels, 0.98)
+    assert not np.isfinite(threshold)
+    assert not np.any(margins >= threshold)
+    print("✓ calibrate_threshold")
+
+def test_stratified_split():
+    """Checks that every class keeps a training clip and no clip is lost or reused."""
+    labels = np.array([0] * 10 + [1] * 3 + [2])
+    train_idx, calib_idx, test_idx = stratified_split(labels, 0.4, 0.4, np.random.default_rng(0))
+    all_idx = np.concatenate([train_idx, calib_idx, test_idx])
+    assert sorted(all_idx) == list(range(len(labels)))
+    for label in np.unique(labels):
+        assert np.any(labels[train_idx] == label)
+    assert list(train_idx[labels[train_idx] == 2]) == [13]
+    print("✓ stratified_split")
+
+if __name__ == "__main__":
+    try:
+        test_top_margin()
+        test_calibrate_threshold()
+        test_stratified_split()
+    except AssertionError as e:
+        print(f"✗ Cascade helper test failed: {e!r}")
+        sys.exit(1)
+    sys.exit(0)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+train_cascade.py
+
+Trains and calibrates the cheap stage-1 classifier used by the cascade in
+phoneme_classifier_service.PhonemeClassifier.
+
+Stage 1 is a nearest-centroid model on pooled log-mel statistics (per-band
+mean and std over time). It uses the same preprocessing as the CNN and the
+same classes as the label encoder. Clips are split per class into train,
+calibration and test sets. Stage 1 is fitted on the train set. On the
+calibration set, the softmax temperature is fitted so stage-1 confidences are
+calibrated probabilities comparable to the CNN's, and the margin threshold is
+the smallest one that still reaches the target accuracy. If no threshold
+does, stage 1 is saved disabled. The per-stage report comes from the test
+set, and the saved model is the one the threshold was calibrated on.
+
+Usage:
+  python3 train_cascade.py <dataset_dir> [--target-accuracy 0.98]
+
+<dataset_dir> holds one sub-folder per phoneme label, named like the
+label encoder classes, each containing audio clips of that phoneme.
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import joblib
+
+from phoneme_classifier_service import (
+    CASCADE_PATH,
+    PhonemeClassifier,
+    nearest_centroid_probs,
+    pool_log_mel,
+    top_margin,
+)
+
+AUDIO_EXTENSIONS = (".wav", ".webm", ".mp3", ".ogg", ".flac", ".m4a")
+
+def load_dataset(classifier, dataset_dir):
+    """Returns log-mel spectrograms and label-encoder indices for every clip."""
+    classes = list(classifier.label_encoder.classes_)
+    spectrograms, labels = [], []
+    for label in sorted(os.listdir(dataset_dir)):
+        label_dir = os.path.join(dataset_dir, label)
+        if not os.path.isdir(label_dir):
+            continue
+        if label not in classes:
+            print(f"Skipping '{label}': not a label encoder class")
+            continue
+        for name in sorted(os.listdir(label_dir)):
+            if not name.lower().endswith(AUDIO_EXTENSIONS):
+                continue
+            spec, _ = classifier.preprocess_audio_file(os.path.join(label_dir, name))
+            if spec is None:
+                print(f"Skipping {label}/{name}: no speech detected or features failed")
+                continue
+            spectrograms.append(spec)
+            labels.append(classes.index(label))
+    return spectrograms, np.array(labels)
+
+def fit_stage1(pooled, labels, classes, temperature=1.0):
+    """Fits standardisation statistics and one centroid per class."""
+    missing = [c for i, c in enumerate(classes) if not np.any(labels == i)]
+    if missing:
+        raise ValueError(f"No training clips for classes: {missing}")
+    mean = pooled.mean(axis=0)
+    std = pooled.std(axis=0) + 1e-6
+    standardized = (pooled - mean) / std
+    centroids = np.stack([standardized[labels == i].mean(axis=0) for i in range(len(classes))])
+    return {
+        "classes": list(classes),
+        "mean": mean.astype(np.float32),
+        "std": std.astype(np.float32),
+        "centroids": centroids.astype(np.float32),
+        "temperature": temperature,
+    }
+
+def fit_temperature(pooled, labels, stage1):
+    """Softmax temperature minimising negative log-likelihood on the given clips."""
+    best_temperature, best_nll = 1.0, np.inf
+    for temperature in np.logspace(-2, 2, 41):
+        candidate = dict(stage1, temperature=float(temperature))
+        probs = np.array([nearest_centroid_probs(x, candidate)[y] for x, y in zip(pooled, labels)])
+        nll = -np.mean(np.log(np.maximum(probs, 1e-12)))
+        if nll < best_nll:
+            best_temperature, best_nll = float(temperature), nll
+    return best_temperature
+
+def stage1_margins(pooled, stage1):
+    """Returns stage-1 predictions and top-1/top-2 probability margins."""
+    preds, margins = [], []
+    for x in pooled:
+        predicted_index, margin = top_margin(nearest_centroid_probs(x, stage1))
+        preds.append(predicted_index)
+        margins.append(margin)
+    return np.array(preds), np.array(margins)
+
+def stratified_split(labels, calib_fraction, test_fraction, rng):
+    """Splits clip indices per class into train/calibration/test, keeping at least one training clip per class."""
+    train_idx, calib_idx, test_idx = [], [], []
+    for label in np.unique(labels):
+        idx = rng.permutation(np.flatnonzero(labels == label))
+        n_test = int(round(len(idx) * test_fraction))
+        n_calib = int(round(len(idx) * calib_fraction))
+        # Never take the last training clip for a class
+        while n_test + n_calib > len(idx) - 1:
+            if n_test >= n_calib:
+                n_test -= 1
+            else:
+                n_calib -= 1
+        test_idx.extend(idx[:n_test])
+        calib_idx.extend(idx[n_test:n_test + n_calib])
+        train_idx.extend(idx[n_test + n_calib:])
+    return np.array(train_idx, dtype=int), np.array(calib_idx, dtype=int), np.array(test_idx, dtype=int)
+
+def calibrate_threshold(preds, margins, labels, target_accuracy):
+    """
+    Smallest margin threshold whose accepted stage-1 answers meet target_accuracy.
+
+    Returns inf when none does. Margins from float32 probabilities can
+    saturate at exactly 1.0, so 1.0 would not disable stage 1.
+    """
+    for threshold in np.round(np.arange(0.0, 1.0, 0.01), 2):
+        accepted = margins >= threshold
+        if not np.any(accepted):
+            break
+        if np.mean(preds[accepted] == labels[accepted]) >= target_accuracy:
+            return float(threshold)
+    # Stage 1 never reaches the target: no margin can reach this threshold
+    return float("inf")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("dataset_dir", help="Folder with one sub-folder of clips per phoneme label")
+    parser.add_argument("--target-accuracy", type=float, default=0.98, help="Required stage-1 accuracy on the clips it answers")
+    parser.add_argument("--calib", type=float, default=0.2, help="Fraction of each class's clips used to calibrate the threshold")
+    parser.add_argument("--test", type=float, default=0.2, help="Fraction of each class's clips used only for the report")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=CASCADE_PATH)
+    args = parser.parse_args()
+
+    classifier = PhonemeClassifier(use_cascade=False)
+    classes = list(classifier.label_encoder.classes_)
+
+    print("Extracting features...")
+    spectrograms, labels = load_dataset(classifier, args.dataset_dir)
+    missing = [c for i, c in enumerate(classes) if not np.any(labels == i)]
+    if missing:
+        sys.exit(f"Dataset too small: no usable clips for classes {missing}. Every label encoder class needs clips.")
+    pooled = np.stack([pool_log_mel(s) for s in spectrograms])
+
+    rng = np.random.default_rng(args.seed)
+    train_idx, calib_idx, test_idx = stratified_split(labels, args.calib, args.test, rng)
+    if len(calib_idx) == 0 or len(test_idx) == 0:
+        sys.exit(f"Dataset too small: {len(labels)} clips leave no calibration or test clips "
+                 "after keeping one training clip per class. Add clips or raise --calib/--test.")
+
+    # --- Fit on train, calibrate on calibration ---
+    stage1 = fit_stage1(pooled[train_idx], labels[train_idx], classes)
+    stage1["temperature"] = fit_temperature(pooled[calib_idx], labels[calib_idx], stage1)
+    preds, margins = stage1_margins(pooled[calib_idx], stage1)
+    threshold = calibrate_threshold(preds, margins, labels[calib_idx], args.target_accuracy)
+
+    # --- Per-stage report on the test clips (not used for fitting or calibration) ---
+    test_labels = labels[test_idx]
+    preds, margins = stage1_margins(pooled[test_idx], stage1)
+    confidences = np.array([np.max(nearest_centroid_probs(x, stage1)) for x in pooled[test_idx]])
+    accepted = margins >= threshold
+    cnn_preds = np.array([
+        np.argmax(classifier.load_cnn_model().predict(spectrograms[i][np.newaxis, ..., np.newaxis], verbose=0)[0])
+        for i in test_idx
+    ])
+    cascade_preds = np.where(accepted, preds, cnn_preds)
+
+    print("="*45)
+    print("CASCADE CALIBRATION".center(45))
+    print(f"   Train / calibration / test clips: {len(train_idx)} / {len(calib_idx)} / {len(test_idx)}")
+    print(f"   Softmax temperature (from calibration clips): {stage1['temperature']:.3g}")
+    if np.isfinite(threshold):
+        print(f"   Margin threshold (from calibration clips): {threshold:.2f}")
+    else:
+        print(f"   Stage 1 DISABLED: no threshold reached {args.target_accuracy*100:.2f}% on calibration clips")
+    print("   Test-clip results:")
+    print(f"   Stage 1 hit rate: {np.mean(accepted)*100:.2f}%")
+    print(f"   Stage 2 hit rate: {np.mean(~accepted)*100:.2f}%")
+    if np.any(accepted):
+        print(f"   Stage 1 accuracy (answered): {np.mean(preds[accepted] == test_labels[accepted])*100:.2f}%")
+        print(f"   Stage 1 mean confidence (answered): {np.mean(confidences[accepted])*100:.2f}%")
+    print(f"   CNN-only accuracy: {np.mean(cnn_preds == test_labels)*100:.2f}%")
+    print(f"   Cascade accuracy: {np.mean(cascade_preds == test_labels)*100:.2f}%")
+    print("="*45)
+
+    # Save exactly the model the threshold was calibrated on
+    stage1["threshold"] = threshold
+    stage1["enabled"] = bool(np.isfinite(threshold))
+    joblib.dump(stage1, args.output)
+    print(f"Saved stage-1 classifier to {args.output}")
+
+if __name__ == "__main__":
+    main()